@@ -7,6 +7,7 @@
 #include <mutex>
 #include <condition_variable>
 #include <atomic>
+#include <unordered_map>
 
 namespace dkv {
 
@@ -25,13 +26,18 @@ struct CommandTask {
 class DKVServer;
 
 // 工作线程池，执行命令
+// 同一客户端的命令同一时刻只由一个工作线程执行，按接收顺序执行并返回响应
+// （流水线请求依赖这一顺序），不同客户端的命令仍由所有工作线程并行执行
 class WorkerThreadPool {
 private:
     DKVServer* server_;
     std::atomic<bool> stop_;
 
     std::vector<std::thread> workers_;
-    std::queue<CommandTask> task_queue_;
+    // 每个客户端待执行的命令，客户端有命令在执行或排队时才存在对应的条目
+    std::unordered_map<int, std::queue<CommandTask>> client_tasks_;
+    // 有待执行命令且当前没有工作线程在执行其命令的客户端
+    std::queue<int> ready_clients_;
     std::mutex queue_mutex_;
     std::condition_variable condition_;
 public:
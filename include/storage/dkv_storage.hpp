@@ -82,6 +82,7 @@ public:
     
     // 哈希操作
     bool hset(TransactionID tx_id, const Key& key, const Value& field, const Value& value);
+    bool hset(TransactionID tx_id, const Key& key, const Value& field, const Value& value, bool& is_new_field);
     std::string hget(TransactionID tx_id, const Key& key, const Value& field);
     std::vector<std::pair<Value, Value>> hgetall(TransactionID tx_id, const Key& key);
     bool hdel(TransactionID tx_id, const Key& key, const Value& field);
@@ -168,9 +168,13 @@ Response CommandHandler::handleHSetCommand(TransactionID tx_id, const Command& c
         const std::string& field = command.args[i];
         const std::string& value = command.args[i + 1];
         
-        bool success = storage_engine_->hset(tx_id, key, field, value);
+        // 与Redis一致，只统计新增的字段，更新已有字段不计入返回值
+        bool is_new_field = false;
+        bool success = storage_engine_->hset(tx_id, key, field, value, is_new_field);
         if (success) {
-            added_count++;
+            if (is_new_field) {
+                added_count++;
+            }
             need_inc_dirty = true;
         }
     }
@@ -813,8 +817,8 @@ Response CommandHandler::handleBitCountCommand(TransactionID tx_id, const Comman
 }
 
 Response CommandHandler::handleBitOpCommand(TransactionID tx_id, const Command& command, bool& need_inc_dirty) {
-    if (command.args.size() < 4) {
-        return Response(ResponseStatus::ERROR, "BITOP命令需要至少4个参数");
+    if (command.args.size() < 3) {
+        return Response(ResponseStatus::ERROR, "BITOP命令需要至少3个参数");
     }
     
     const std::string& operation = command.args[0];
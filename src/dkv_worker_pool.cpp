@@ -27,7 +27,14 @@ void WorkerThreadPool::enqueue(const CommandTask& task) {
         if (stop_.load()) {
             throw std::runtime_error("线程池已停止，无法添加新任务");
         }
-        task_queue_.push(task);
+        
+        // 客户端已有命令在执行或排队时，只追加到其队列末尾，由当前执行其命令的线程依次调度
+        auto inserted = client_tasks_.try_emplace(task.client_fd);
+        inserted.first->second.push(task);
+        if (!inserted.second) {
+            return;
+        }
+        ready_clients_.push(task.client_fd);
     }
     
     // 通知一个等待的工作线程
@@ -63,22 +70,26 @@ void WorkerThreadPool::workerThread() {
     CommandTask task;
     
     while (true) {
+        int client_fd;
         {
             std::unique_lock<std::mutex> lock(queue_mutex_);
             
             // 等待直到有任务或线程池停止
             condition_.wait(lock, [this] { 
-                return stop_.load() || !task_queue_.empty(); 
+                return stop_.load() || !ready_clients_.empty(); 
             });
             
             // 如果线程池已停止且任务队列为空，则退出
-            if (stop_.load() && task_queue_.empty()) {
+            if (stop_.load() && ready_clients_.empty()) {
                 break;
             }
             
-            // 获取任务
-            task = std::move(task_queue_.front());
-            task_queue_.pop();
+            // 获取一个就绪客户端最早提交的任务
+            client_fd = ready_clients_.front();
+            ready_clients_.pop();
+            std::queue<CommandTask>& tasks = client_tasks_[client_fd];
+            task = std::move(tasks.front());
+            tasks.pop();
         }
         
         Response response;
@@ -95,6 +106,22 @@ void WorkerThreadPool::workerThread() {
         if (task.sub_reactor) {
             task.sub_reactor->handleCommandResult(task.client_fd, response);
         }
+        
+        // 响应发送后才调度该客户端的下一条命令，保证响应顺序与命令顺序一致
+        bool has_more;
+        {
+            std::lock_guard<std::mutex> lock(queue_mutex_);
+            auto it = client_tasks_.find(client_fd);
+            has_more = !it->second.empty();
+            if (has_more) {
+                ready_clients_.push(client_fd);
+            } else {
+                client_tasks_.erase(it);
+            }
+        }
+        if (has_more) {
+            condition_.notify_one();
+        }
     }
 }
 
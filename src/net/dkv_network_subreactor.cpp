@@ -77,16 +77,17 @@ void SubReactor::addClient(int client_fd, const sockaddr_in& client_addr) {
         return;
     }
     
+    // 先登记连接再注册事件：边缘触发模式下，若数据在登记前到达，该事件会被丢弃且不会再次通知
+    std::lock_guard<std::mutex> lock(clients_mutex_);
+    auto client = std::make_unique<ClientConnection>(client_fd, client_addr);
+    clients_[client_fd] = std::move(client);
+    
     if (!addEpollEvent(client_fd, EPOLLIN | EPOLLET)) {
         DKV_LOG_ERROR("添加客户端事件失败");
-        close(client_fd);
+        clients_.erase(client_fd);
         return;
     }
     
-    std::lock_guard<std::mutex> lock(clients_mutex_);
-    auto client = std::make_unique<ClientConnection>(client_fd, client_addr);
-    clients_[client_fd] = std::move(client);
-    
     DKV_LOG_INFO("子Reactor添加客户端连接: ", inet_ntoa(client_addr.sin_addr), ":", ntohs(client_addr.sin_port));
 }
 
@@ -257,6 +257,8 @@ void StorageEngine::cleanupEmptyKey() {
             }
             continue;
         }
+        // 字符串、位图等其他类型没有"空"的状态，直接跳过
+        ++it;
     }
 }
 
@@ -337,6 +339,11 @@ std::unique_ptr<DataItem> StorageEngine::createBitmapItem(Timestamp expire_time)
 }
 
 bool StorageEngine::hset(TransactionID tx_id, const Key& key, const Value& field, const Value& value) {
+    bool is_new_field = false;
+    return hset(tx_id, key, field, value, is_new_field);
+}
+
+bool StorageEngine::hset(TransactionID tx_id, const Key& key, const Value& field, const Value& value, bool& is_new_field) {
     auto lock = inner_storage_.wlock();
     DataItem* item = getDataItem(tx_id, key);
     if (!item || item->isExpired()) {
@@ -344,6 +351,7 @@ bool StorageEngine::hset(TransactionID tx_id, const Key& key, const Value& field
         auto new_hash_item = createHashItem();
         auto* hash_item_ptr = dynamic_cast<HashItem*>(new_hash_item.get());
         if (hash_item_ptr && hash_item_ptr->setField(field, value)) {
+            is_new_field = true;
             return inner_storage_.set(tx_id, key, std::move(new_hash_item));
         }
         return false;
@@ -354,7 +362,8 @@ bool StorageEngine::hset(TransactionID tx_id, const Key& key, const Value& field
         return false; // 键存在但不是哈希类型
     }
     
-    // 更新哈希项
+    // 更新哈希项，在同一把写锁内判断字段是否为新增
+    is_new_field = !hash_item->existsField(field);
     return hash_item->setField(field, value);
 }
 
@@ -87,6 +87,23 @@ bool testStorageEngine() {
     return true;
 }
 
+// 测试清理空集合类型的键，其他类型的键应该保留
+bool testCleanupEmptyKey() {
+    StorageEngine storage;
+    assert(storage.set(NO_TX, "string_key", "value"));
+    assert(storage.setBit(NO_TX, "bitmap_key", 0, true));
+    assert(storage.hset(NO_TX, "hash_key", "field", "value"));
+    assert(storage.hdel(NO_TX, "hash_key", "field"));
+    assert(storage.size() == 3);
+    
+    storage.cleanupEmptyKey();
+    assert(storage.size() == 2);
+    assert(storage.get(NO_TX, "string_key") == "value");
+    assert(storage.getBit(NO_TX, "bitmap_key", 0) == true);
+    
+    return true;
+}
+
 bool testRESPProtocol() {
     // 测试命令解析
     string command_data = "*3\r\n$3\r\nSET\r\n$3\r\nkey\r\n$5\r\nvalue\r\n";
@@ -169,6 +186,7 @@ int main() {
     // 运行所有测试
     runner.runTest("Utils工具函数", testUtils);
     runner.runTest("StorageEngine操作", testStorageEngine);
+    runner.runTest("清理空键", testCleanupEmptyKey);
     runner.runTest("RESP协议解析", testRESPProtocol);
     runner.runTest("命令执行", testCommandExecution);
     runner.runTest("集成测试", testIntegration);
@@ -4,894 +4,733 @@
 使用socket连接到DKV服务器并发送RESP协议命令
 """
 
+import functools
+import io
+import os
 import socket
+import threading
 import time
 import sys
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
-def send_command(sock, command):
-    """发送RESP协议命令"""
-    # 将命令转换为RESP数组格式
-    parts = command.split()
-    resp = f"*{len(parts)}\r\n"
+# 设置环境变量DKV_TEST_VERBOSE=1时打印每条命令、RESP格式、服务器响应和通过的断言
+VERBOSE = os.environ.get("DKV_TEST_VERBOSE") == "1"
+ANY = object()  # 不检查响应内容
+_output = threading.local()  # 并发运行的测试组各自的输出缓冲区
+
+def log(*args):
+    """打印一行输出；在并发运行的测试组中写入该组的缓冲区，由主线程在该组结束后统一打印"""
+    buffer = getattr(_output, "buffer", None)
+    print(*args, file=buffer if buffer is not None else sys.stdout)
+
+class RespError(bytes):
+    """服务器返回的RESP错误响应"""
+
+def parse_resp(buf, pos, end):
+    """从pos开始解析一条响应，返回(值, 下一条响应的位置)，数据不完整时返回None
+
+    简单字符串和批量字符串解析为bytes，整数解析为int，数组解析为list，
+    空批量字符串和空数组解析为None，错误解析为RespError
+    """
+    line_end = buf.find(b"\r\n", pos, end)
+    if line_end < 0:
+        return None
+    prefix = buf[pos]
+    line = bytes(buf[pos + 1:line_end])
+    pos = line_end + 2
+    if prefix == 0x2B:  # +
+        return line, pos
+    if prefix == 0x2D:  # -
+        return RespError(line), pos
+    if prefix == 0x3A:  # :
+        return int(line), pos
+    if prefix == 0x24:  # $
+        length = int(line)
+        if length < 0:
+            return None, pos
+        if pos + length + 2 > end:
+            return None
+        data = bytes(buf[pos:pos + length])
+        assert buf[pos + length:pos + length + 2] == b"\r\n", "批量字符串缺少结尾的CRLF"
+        # DKV将数组响应包装在批量字符串中返回，这里将其展开为列表；
+        # 用户数据也可能以*开头，只有整个批量字符串恰好是一个完整的数组时才展开
+        if data.startswith(b"*"):
+            try:
+                result = parse_resp(data, 0, len(data))
+            except (ValueError, AssertionError):
+                result = None
+            if result is not None and result[1] == len(data):
+                return result[0], pos + length + 2
+        return data, pos + length + 2
+    if prefix == 0x2A:  # *
+        count = int(line)
+        if count < 0:
+            return None, pos
+        items = []
+        for _ in range(count):
+            result = parse_resp(buf, pos, end)
+            if result is None:
+                return None
+            item, pos = result
+            items.append(item)
+        return items, pos
+    raise ValueError(f"无法识别的RESP响应类型: {bytes([prefix])!r}")
+
+class RespReader:
+    """RESP响应的流式解析器
+
+    从socket读取数据到不断增长的缓冲区中，每次recv尽量多读，
+    解析完缓冲区中已有的全部响应后才进行下一次recv，
+    多余的数据留在缓冲区中供下一次调用使用，因此每个连接只创建一个RespReader
+    """
+
+    RECV_SIZE = 65536  # 每次recv_into最多读取的字节数
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.buf = bytearray(self.RECV_SIZE)
+        self.start = 0  # 下一条响应在缓冲区中的起始位置
+        self.end = 0    # 缓冲区中已接收数据的末尾
+
+    def recv_one(self):
+        """读取一条完整的响应，返回值的类型见parse_resp"""
+        return self.recv_many(1)[0]
+
+    def recv_many(self, count):
+        """读取count条完整的响应，返回按顺序排列的列表"""
+        responses = []
+        while True:
+            # 先解析缓冲区中已有的全部响应，不够时再从socket读取
+            while len(responses) < count and self.start < self.end:
+                result = parse_resp(self.buf, self.start, self.end)
+                if result is None:
+                    break
+                value, self.start = result
+                responses.append(value)
+            if len(responses) == count:
+                return responses
+            self._recv_more()
+
+    def _recv_more(self):
+        # 将未解析的数据移动到缓冲区头部，空间不足时扩容
+        if self.start > 0:
+            remaining = self.end - self.start
+            self.buf[:remaining] = self.buf[self.start:self.end]
+            self.start, self.end = 0, remaining
+        if len(self.buf) - self.end < self.RECV_SIZE:
+            self.buf.extend(bytes(max(len(self.buf), self.RECV_SIZE)))
+        n = self.sock.recv_into(memoryview(self.buf)[self.end:self.end + self.RECV_SIZE])
+        if n == 0:
+            raise ConnectionError("服务器在返回完整响应前关闭了连接")
+        self.end += n
+
+@functools.lru_cache(maxsize=4096)
+def _encode(command):
+    """将命令编码为RESP数组格式的字节串
+
+    相同的命令字符串在测试中会反复发送，编码结果按命令字符串缓存
+    """
+    parts = command.encode().split()
+    out = [b"*%d\r\n" % len(parts)]
     for part in parts:
-        resp += f"${len(part)}\r\n{part}\r\n"
-    
-    print(f"发送命令: {command}")
-    print(f"RESP格式: {repr(resp)}")
-    
-    sock.send(resp.encode())
-    
+        out.append(b"$%d\r\n" % len(part))
+        out.append(part)
+        out.append(b"\r\n")
+    return b"".join(out)
+
+def send_command(reader, command):
+    """发送RESP协议命令，并通过连接的RespReader读取响应"""
+    resp = _encode(command)
+
+    if VERBOSE:
+        log(f"发送命令: {command}")
+        log(f"RESP格式: {repr(resp)}")
+
+    reader.sock.sendall(resp)
+
     # 接收响应
-    response = sock.recv(1024).decode()
-    print(f"服务器响应: {repr(response)}")
+    response = reader.recv_one()
+    if VERBOSE:
+        log(f"服务器响应: {repr(response)}")
     return response
 
-def assert_response(response, expected_content, command=None):
-    """断言服务器响应包含预期内容"""
-    try:
-        assert expected_content in response
+def send_payload(reader, payload, count):
+    """发送已编码的RESP负载，并按顺序读取count条响应"""
+    if VERBOSE:
+        log(f"RESP格式: {repr(payload)}")
+
+    reader.sock.sendall(payload)
+
+    # 接收响应，直到收齐与命令数量相同的响应
+    responses = reader.recv_many(count)
+
+    if VERBOSE:
+        for response in responses:
+            log(f"服务器响应: {repr(response)}")
+    return responses
+
+def match_response(response, expected):
+    """判断响应是否与预期值一致
+
+    预期值为bytes时按字节串比较；为int或float时，按数值比较（DKV以批量字符串返回整数）；
+    为int类型本身时，只要求响应是一个整数；为bytes类型本身时，只要求响应是非空的字节串；
+    为RespError类型时，只要求响应是错误；为range时，要求响应是该范围内的整数；
+    为set时，按无序集合比较数组响应；
+    为dict时，将数组响应按字段、值交替的顺序配对后比较（用于HGETALL）
+    """
+    if expected is RespError:
+        return isinstance(response, RespError)
+    if isinstance(response, RespError):
+        return False
+    if expected is bytes:
+        return isinstance(response, bytes) and len(response) > 0
+    if expected is int or isinstance(expected, (int, float)):
+        try:
+            value = int(response) if expected is int else type(expected)(response)
+        except (TypeError, ValueError):
+            return False
+        return expected is int or value == expected
+    if isinstance(expected, range):
+        try:
+            return int(response) in expected
+        except (TypeError, ValueError):
+            return False
+    if isinstance(expected, set):
+        return isinstance(response, list) and set(response) == expected
+    if isinstance(expected, dict):
+        return (isinstance(response, list) and len(response) == 2 * len(expected)
+                and dict(zip(response[::2], response[1::2])) == expected)
+    return response == expected
+
+def assert_response(response, expected, command=None):
+    """断言服务器响应与预期值一致，不一致时抛出AssertionError"""
+    if not match_response(response, expected):
+        log(f"❌ 断言失败: 期望 {expected!r}，实际响应 {response!r}")
         if command:
-            print(f"✅ 断言通过: '{command}' 的响应包含 '{expected_content}'")
-        else:
-            print(f"✅ 断言通过: 响应包含 '{expected_content}'")
-        print()
-        return True
-    except AssertionError:
-        print(f"❌ 断言失败: 期望 '{expected_content}' 在响应 '{response}' 中")
+            log(f"  命令: {command}")
+        log()
+        raise AssertionError(f"'{command}' 期望 {expected!r}，实际响应 {response!r}")
+    if VERBOSE:
         if command:
-            print(f"  命令: {command}")
-        print()
-        return False
+            log(f"✅ 断言通过: '{command}' 的响应为 {expected!r}")
+        else:
+            log(f"✅ 断言通过: 响应为 {expected!r}")
+        log()
 
-def test_basic(sock):
-    """测试基本命令"""
-    print("=" * 50)
-    print("测试基本命令")
-    print("=" * 50)
-    
-    # 测试SET命令
-    response = send_command(sock, "SET test_key hello_world")
-    assert_response(response, "OK", "SET test_key hello_world")
-    
-    # 测试GET命令
-    response = send_command(sock, "GET test_key")
-    assert_response(response, "hello_world", "GET test_key")
-    
-    # 测试EXISTS命令
-    response = send_command(sock, "EXISTS test_key")
-    assert_response(response, "1", "EXISTS test_key")
-    
+Script = namedtuple("Script", ["payload", "checks"])
+
+def compile_script(checks):
+    """将一组检查预先编码为一次性发送的RESP负载
+
+    checks中的每一项为 (命令, 预期值) 或 (命令, 预期值, 断言描述)，
+    预期值的比较规则见match_response，为ANY时不做断言。
+    测试脚本是固定的，在模块导入时编码一次即可，运行时直接发送
+    """
+    payload = b"".join(_encode(check[0]) for check in checks)
+    return Script(payload, checks)
+
+def run_script(reader, script):
+    """以流水线方式发送预编码的脚本，并逐条断言响应"""
+    if VERBOSE:
+        for check in script.checks:
+            log(f"发送命令: {check[0]}")
+    responses = send_payload(reader, script.payload, len(script.checks))
+    for check, response in zip(script.checks, responses):
+        expected = check[1]
+        if expected is ANY:
+            continue
+        label = check[2] if len(check) > 2 else check[0]
+        assert_response(response, expected, label)
+    return responses
+
+def print_header(title):
+    """打印一组测试的标题"""
+    log("=" * 50)
+    log(title)
+    log("=" * 50)
+
+SCRIPT_BASIC = compile_script([
+    # 清除上一次中断的运行可能遗留的键
+    ("DEL test_key counter multi_key1 multi_key2 star_key1 star_key2", ANY),
+    # 测试SET、GET和EXISTS命令
+    ("SET test_key hello_world", b"OK"),
+    ("GET test_key", b"hello_world"),
+    ("EXISTS test_key", 1),
     # 测试计数器相关命令
-    response = send_command(sock, "SET counter 100")
-    assert_response(response, "OK", "SET counter 100")
-    
-    response = send_command(sock, "INCR counter")
-    assert_response(response, "101", "INCR counter")
-    
-    response = send_command(sock, "GET counter")
-    assert_response(response, "101", "GET counter")
-    
-    response = send_command(sock, "DECR counter")
-    assert_response(response, "100", "DECR counter")
-    
-    response = send_command(sock, "GET counter")
-    assert_response(response, "100", "GET counter")
-    
-    # 测试DEL命令
-    response = send_command(sock, "DEL test_key")
-    assert_response(response, "1", "DEL test_key")
-    
-    # 验证键已被删除
-    response = send_command(sock, "GET test_key")
-    assert_response(response, "-1", "GET test_key (after DEL)")
-    
-    response = send_command(sock, "EXISTS test_key")
-    assert_response(response, "0", "EXISTS test_key (after DEL)")
-    
+    ("SET counter 100", b"OK"),
+    ("INCR counter", 101),
+    ("GET counter", b"101"),
+    ("DECR counter", 100),
+    ("GET counter", b"100"),
+    # 测试DEL命令，并验证键已被删除
+    ("DEL test_key", 1),
+    ("GET test_key", None, "GET test_key (after DEL)"),
+    ("EXISTS test_key", 0, "EXISTS test_key (after DEL)"),
     # 测试EXISTS命令多参数功能
-    response = send_command(sock, "SET multi_key1 value1")
-    assert_response(response, "OK", "SET multi_key1 value1")
-    
-    response = send_command(sock, "SET multi_key2 value2")
-    assert_response(response, "OK", "SET multi_key2 value2")
-    
-    # 测试多个存在的键
-    response = send_command(sock, "EXISTS multi_key1 multi_key2")
-    assert_response(response, "2", "EXISTS multi_key1 multi_key2 (both exist)")
-    
-    # 测试混合存在和不存在的键
-    response = send_command(sock, "EXISTS multi_key1 non_existent_key multi_key2")
-    assert_response(response, "2", "EXISTS mixed keys")
-    
-    # 测试多个不存在的键
-    response = send_command(sock, "EXISTS non_existent_key1 non_existent_key2")
-    assert_response(response, "0", "EXISTS multiple non-existent keys")
-
-def test_datatype_string(sock):
-    """测试字符串数据类型相关命令"""
-    print("=" * 50)
-    print("测试字符串数据类型相关命令")
-    print("=" * 50)
-    
+    ("SET multi_key1 value1", b"OK"),
+    ("SET multi_key2 value2", b"OK"),
+    ("EXISTS multi_key1 multi_key2", 2, "EXISTS multi_key1 multi_key2 (both exist)"),
+    ("EXISTS multi_key1 non_existent_key multi_key2", 2, "EXISTS mixed keys"),
+    ("EXISTS non_existent_key1 non_existent_key2", 0, "EXISTS multiple non-existent keys"),
+    # 测试以*开头的值，不能被当作数组响应展开
+    ("SET star_key1 *abc", b"OK"),
+    ("GET star_key1", b"*abc"),
+    ("SET star_key2 *1", b"OK"),
+    ("GET star_key2", b"*1"),
+    ("DEL star_key1 star_key2", 2),
+])
+
+def test_basic(reader):
+    """测试基本命令"""
+    print_header("测试基本命令")
+
+    run_script(reader, SCRIPT_BASIC)
+
+SCRIPT_STRING = compile_script([
+    # 清除上一次中断的运行可能遗留的键
+    ("DEL temp_key ttl_key", ANY),
     # 测试过期时间
-    response = send_command(sock, "SET temp_key temp_value")
-    assert_response(response, "OK", "SET temp_key temp_value")
-    
-    response = send_command(sock, "EXPIRE temp_key 2")
-    assert_response(response, "1", "EXPIRE temp_key 2")
-    
+    ("SET temp_key temp_value", b"OK"),
+    ("EXPIRE temp_key 1", 1),
     # 测试为不存在的键设置过期时间
-    response = send_command(sock, "EXPIRE non_existent_key 10")
-    assert_response(response, "0", "EXPIRE non_existent_key 10")
-    
-    response = send_command(sock, "TTL temp_key")
-    # TTL可能返回1或2，这里只检查它是一个数字
-    assert any(char.isdigit() for char in response), "TTL返回值应该是一个数字"
-    
-    response = send_command(sock, "GET temp_key")
-    assert_response(response, "temp_value", "GET temp_key (before expiration)")
-    
-    print("等待2秒让键过期...")
-    time.sleep(2.5)
-    
-    response = send_command(sock, "GET temp_key")
-    assert_response(response, "-1", "GET temp_key (after expiration)")
-    
-    response = send_command(sock, "TTL temp_key")
-    assert_response(response, "-2", "TTL temp_key (after expiration)")
-
-def test_datatype_hash(sock):
-    """测试哈希数据类型相关命令"""
-    print("=" * 50)
-    print("测试哈希数据类型相关命令")
-    print("=" * 50)
-    
+    ("EXPIRE non_existent_key 10", 0),
+    ("GET temp_key", b"temp_value", "GET temp_key (before expiration)"),
+    # 测试TTL，使用单独的键以免等待它过期
+    ("SET ttl_key ttl_value", b"OK"),
+    ("EXPIRE ttl_key 10", 1),
+    # TTL按秒向下取整，可能返回9或10
+    ("TTL ttl_key", range(9, 11)),
+    ("DEL ttl_key", 1),
+])
+
+SCRIPT_STRING_EXPIRED = compile_script([
+    ("GET temp_key", None, "GET temp_key (after expiration)"),
+    ("TTL temp_key", -2, "TTL temp_key (after expiration)"),
+])
+
+def test_datatype_string(reader):
+    """测试字符串数据类型相关命令"""
+    print_header("测试字符串数据类型相关命令")
+
+    run_script(reader, SCRIPT_STRING)
+
+    # 轮询直到键过期，而不是固定等待过期时间
+    log("等待键过期...")
+    deadline = time.monotonic() + 3
+    while send_command(reader, "GET temp_key") is not None and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+    run_script(reader, SCRIPT_STRING_EXPIRED)
+
+SCRIPT_HASH = compile_script([
+    # 清除上一次中断的运行可能遗留的键
+    ("DEL user1 user2 user3", ANY),
     # 测试HSET和HGET
-    response = send_command(sock, "HSET user1 name John")
-    assert_response(response, "1", "HSET user1 name John")
-    
-    response = send_command(sock, "HSET user1 age 30")
-    assert_response(response, "1", "HSET user1 age 30")
-    
-    response = send_command(sock, "HSET user1 email john@example.com")
-    assert_response(response, "1", "HSET user1 email john@example.com")
-    
-    response = send_command(sock, "HGET user1 name")
-    assert_response(response, "John", "HGET user1 name")
-    
-    response = send_command(sock, "HGET user1 age")
-    assert_response(response, "30", "HGET user1 age")
-    
-    response = send_command(sock, "HGET user1 email")
-    assert_response(response, "john@example.com", "HGET user1 email")
-    
+    ("HSET user1 name John age 30 email john@example.com", 3),
+    ("HGET user1 name", b"John"),
+    ("HGET user1 age", b"30"),
+    ("HGET user1 email", b"john@example.com"),
     # 测试字段不存在的情况
-    response = send_command(sock, "HGET user1 phone")
-    assert_response(response, "-1", "HGET user1 phone (non-existent field)")
-    
-    response = send_command(sock, "HGET user2 name")
-    assert_response(response, "-1", "HGET user2 name (non-existent key)")
-    
+    ("HGET user1 phone", None, "HGET user1 phone (non-existent field)"),
+    ("HGET user2 name", None, "HGET user2 name (non-existent key)"),
     # 测试HGETALL
-    response = send_command(sock, "HGETALL user1")
-    assert_response(response, "name", "HGETALL user1")
-    assert_response(response, "John", "HGETALL user1")
-    
+    ("HGETALL user1", {b"name": b"John", b"age": b"30", b"email": b"john@example.com"}),
     # 测试HDEL多字段功能 - 混合存在和不存在的字段
     # 先创建一个新的哈希键用于测试
-    response = send_command(sock, "HSET user3 field1 value1 field2 value2")
-    assert_response(response, "2\r\n", "HSET user3 field1 field2")
-    
-    response = send_command(sock, "HDEL user3 field1 field3")
-    assert_response(response, "1\r\n", "HDEL user3 field1 field3 (mixed fields)")
-    
+    ("HSET user3 field1 value1 field2 value2", 2, "HSET user3 field1 field2"),
+    ("HDEL user3 field1 field3", 1, "HDEL user3 field1 field3 (mixed fields)"),
     # 验证只删除了存在的字段
-    response = send_command(sock, "HGET user3 field1")
-    assert_response(response, "-1\r\n", "HGET user3 field1 (after mixed HDEL)")
-    
-    response = send_command(sock, "HGET user3 field2")
-    assert_response(response, "value2", "HGET user3 field2 (should still exist)")
-    
+    ("HGET user3 field1", None, "HGET user3 field1 (after mixed HDEL)"),
+    ("HGET user3 field2", b"value2", "HGET user3 field2 (should still exist)"),
     # 测试HDEL多字段功能 - 删除多个不存在的字段
-    response = send_command(sock, "HDEL non_existent_user field1 field2")
-    assert_response(response, "0\r\n", "HDEL non_existent_user field1 field2 (non-existent key)")
-    
+    ("HDEL non_existent_user field1 field2", 0, "HDEL non_existent_user field1 field2 (non-existent key)"),
     # 测试HDEL
-    response = send_command(sock, "HDEL user1 email")
-    assert_response(response, "1", "HDEL user1 email")
-    
-    response = send_command(sock, "HGET user1 email")
-    assert_response(response, "-1", "HGET user1 email (after HDEL)")
-
+    ("HDEL user1 email", 1),
+    ("HGET user1 email", None, "HGET user1 email (after HDEL)"),
     # 测试HEXISTS
-    response = send_command(sock, "HEXISTS user1 name")
-    assert_response(response, "1\r\n", "HEXISTS user1 name")
-    
-    response = send_command(sock, "HEXISTS user1 email")
-    assert_response(response, "0\r\n", "HEXISTS user1 email (after HDEL)")
-    
+    ("HEXISTS user1 name", 1),
+    ("HEXISTS user1 email", 0, "HEXISTS user1 email (after HDEL)"),
     # 测试HKEYS和HVALS
-    response = send_command(sock, "HKEYS user1")
-    assert_response(response, "name", "HKEYS user1")
-    assert_response(response, "age", "HKEYS user1")
-    
-    response = send_command(sock, "HVALS user1")
-    assert_response(response, "John", "HVALS user1")
-    assert_response(response, "30", "HVALS user1")
-    
+    ("HKEYS user1", {b"name", b"age"}),
+    ("HVALS user1", {b"John", b"30"}),
     # 测试HLEN
-    response = send_command(sock, "HLEN user1")
-    assert_response(response, "2", "HLEN user1")
-    
-    response = send_command(sock, "HLEN user2")
-    assert_response(response, "0", "HLEN user2 (non-existent key)")
-    
+    ("HLEN user1", 2),
+    ("HLEN user2", 0, "HLEN user2 (non-existent key)"),
     # 测试更新字段
-    response = send_command(sock, "HSET user1 name Mike")
-    assert_response(response, "1", "HSET user1 name Mike (update)")
-    
-    response = send_command(sock, "HGET user1 name")
-    assert_response(response, "Mike", "HGET user1 name (after update)")
-    
-    # 测试HSET多字段功能 - 添加多个新字段
-    response = send_command(sock, "HSET user2 field1 value1 field2 value2 field3 value3")
-    assert_response(response, "3", "HSET user2 multiple fields (all new)")
-    
-    # 验证添加的字段
-    response = send_command(sock, "HGET user2 field1")
-    assert_response(response, "value1", "HGET user2 field1 (after multi-field HSET)")
-    
-    response = send_command(sock, "HGET user2 field2")
-    assert_response(response, "value2", "HGET user2 field2 (after multi-field HSET)")
-    
-    response = send_command(sock, "HGET user2 field3")
-    assert_response(response, "value3", "HGET user2 field3 (after multi-field HSET)")
-    
+    ("HSET user1 name Mike", 0, "HSET user1 name Mike (update)"),
+    ("HGET user1 name", b"Mike", "HGET user1 name (after update)"),
+    # 测试HSET多字段功能 - 添加多个新字段，并验证添加的字段
+    ("HSET user2 field1 value1 field2 value2 field3 value3", 3, "HSET user2 multiple fields (all new)"),
+    ("HGET user2 field1", b"value1", "HGET user2 field1 (after multi-field HSET)"),
+    ("HGET user2 field2", b"value2", "HGET user2 field2 (after multi-field HSET)"),
+    ("HGET user2 field3", b"value3", "HGET user2 field3 (after multi-field HSET)"),
     # 测试HSET多字段功能 - 混合新旧字段
-    response = send_command(sock, "HSET user2 field1 new_value field4 value4")
-    assert_response(response, "1", "HSET user2 multiple fields (mixed new/old)")
-    
-    # 测试HDEL多字段功能 - 删除多个存在的字段
-    response = send_command(sock, "HDEL user1 name age")
-    assert_response(response, "2", "HDEL user1 name age (multiple existing fields)")
-    
-    # 验证字段已被删除
-    response = send_command(sock, "HGET user1 name")
-    assert_response(response, "-1", "HGET user1 name (after multi-field HDEL)")
-    
-    response = send_command(sock, "HGET user1 age")
-    assert_response(response, "-1", "HGET user1 age (after multi-field HDEL)")
-
+    # HSET只统计新增的字段，被更新的已有字段不计入
+    ("HSET user2 field1 new_value field4 value4", 1, "HSET user2 multiple fields (mixed new/old)"),
+    # 测试HDEL多字段功能 - 删除多个存在的字段，并验证字段已被删除
+    ("HDEL user1 name age", 2, "HDEL user1 name age (multiple existing fields)"),
+    ("HGET user1 name", None, "HGET user1 name (after multi-field HDEL)"),
+    ("HGET user1 age", None, "HGET user1 age (after multi-field HDEL)"),
     # 测试删除整个哈希键
-    response = send_command(sock, "DEL user1")
-    assert_response(response, "1", "DEL user1")
-    
-    response = send_command(sock, "EXISTS user1")
-    assert_response(response, "0", "EXISTS user1 (after DEL)")
-    
-    response = send_command(sock, "HGETALL user1")
-    assert_response(response, "*0", "HGETALL user1 (after DEL)")
-
-def test_datatype_list(sock):
-    """测试列表数据类型相关命令"""
-    print("=" * 50)
-    print("测试列表数据类型相关命令")
-    print("=" * 50)
-    
+    ("DEL user1", 1),
+    ("EXISTS user1", 0, "EXISTS user1 (after DEL)"),
+    ("HGETALL user1", [], "HGETALL user1 (after DEL)"),
+])
+
+def test_datatype_hash(reader):
+    """测试哈希数据类型相关命令"""
+    print_header("测试哈希数据类型相关命令")
+
+    run_script(reader, SCRIPT_HASH)
+
+SCRIPT_LIST = compile_script([
+    # 清除上一次中断的运行可能遗留的键
+    ("DEL mylist", ANY),
     # 测试LPUSH和RPUSH
-    response = send_command(sock, "LPUSH mylist item1")
-    assert_response(response, "1", "LPUSH mylist item1")
-    
-    response = send_command(sock, "LPUSH mylist item2 item3")
-    assert_response(response, "3", "LPUSH mylist item2 item3")
-    
-    response = send_command(sock, "RPUSH mylist item4")
-    assert_response(response, "4", "RPUSH mylist item4")
-    
+    ("LPUSH mylist item1", 1),
+    ("LPUSH mylist item2 item3", 3),
+    ("RPUSH mylist item4", 4),
     # 测试LLEN
-    response = send_command(sock, "LLEN mylist")
-    assert_response(response, "4", "LLEN mylist")
-    
+    ("LLEN mylist", 4),
     # 测试LRANGE - 获取全部元素
-    response = send_command(sock, "LRANGE mylist 0 -1")
-    # 列表内容应包含所有元素，但顺序可能根据实现有所不同
-    assert_response(response, "item3", "LRANGE mylist 0 -1")
-    assert_response(response, "item2", "LRANGE mylist 0 -1")
-    assert_response(response, "item1", "LRANGE mylist 0 -1")
-    assert_response(response, "item4", "LRANGE mylist 0 -1")
-    
+    ("LRANGE mylist 0 -1", [b"item3", b"item2", b"item1", b"item4"]),
     # 测试LRANGE - 获取部分元素
-    response = send_command(sock, "LRANGE mylist 1 3")
-    
+    ("LRANGE mylist 1 3", [b"item2", b"item1", b"item4"]),
     # 测试LPOP - 单个元素
-    response = send_command(sock, "LPOP mylist")
-    assert_response(response, "item3", "LPOP mylist")
-    
-    response = send_command(sock, "LLEN mylist")
-    assert_response(response, "3", "LLEN mylist (after LPOP)")
-    
+    ("LPOP mylist", b"item3"),
+    ("LLEN mylist", 3, "LLEN mylist (after LPOP)"),
     # 测试LPOP - 多个元素
-    response = send_command(sock, "LPOP mylist 2")
-    assert_response(response, "2", "LPOP mylist 2 (array length)")
-    assert_response(response, "item2", "LPOP mylist 2 (first element)")
-    assert_response(response, "item1", "LPOP mylist 2 (second element)")
-    
-    response = send_command(sock, "LLEN mylist")
-    assert_response(response, "1", "LLEN mylist (after multi LPOP)")
-    
+    ("LPOP mylist 2", [b"item2", b"item1"]),
+    ("LLEN mylist", 1, "LLEN mylist (after multi LPOP)"),
     # 测试RPOP - 单个元素
-    response = send_command(sock, "RPOP mylist")
-    assert_response(response, "item4", "RPOP mylist")
-    
-    response = send_command(sock, "LLEN mylist")
-    assert_response(response, "0", "LLEN mylist (after RPOP)")
-    
+    ("RPOP mylist", b"item4"),
+    ("LLEN mylist", 0, "LLEN mylist (after RPOP)"),
     # 重新构建列表用于RPOP多元素测试
-    response = send_command(sock, "LPUSH mylist item5 item6")
-    assert_response(response, "2", "LPUSH mylist item5 item6")
-    
+    ("LPUSH mylist item5 item6", 2),
     # 测试RPOP - 多个元素
-    response = send_command(sock, "RPOP mylist 2")
-    assert_response(response, "2", "RPOP mylist 2 (array length)")
-    assert_response(response, "item5", "RPOP mylist 2 (first element)")
-    assert_response(response, "item6", "RPOP mylist 2 (second element)")
-    
-    response = send_command(sock, "LLEN mylist")
-    assert_response(response, "0", "LLEN mylist (after multi RPOP)")
-    
+    ("RPOP mylist 2", [b"item5", b"item6"]),
+    ("LLEN mylist", 0, "LLEN mylist (after multi RPOP)"),
     # 测试空列表
-    response = send_command(sock, "LLEN non_existent_list")
-    assert_response(response, "0", "LLEN non_existent_list")
-    
-    response = send_command(sock, "LPOP non_existent_list")
-    assert_response(response, "-1", "LPOP non_existent_list")
-    
+    ("LLEN non_existent_list", 0),
+    ("LPOP non_existent_list", None),
     # 测试空列表的多元素LPOP
-    response = send_command(sock, "LPOP non_existent_list 2")
-    assert_response(response, "-1", "LPOP non_existent_list 2")
-    
+    ("LPOP non_existent_list 2", None),
     # 测试无效的count参数
-    response = send_command(sock, "LPOP mylist abc")
-    assert_response(response, "-", "LPOP mylist abc (invalid count)")
-    
-    response = send_command(sock, "RPOP non_existent_list")
-    assert_response(response, "-1", "RPOP non_existent_list")
-    
+    ("LPOP mylist abc", RespError, "LPOP mylist abc (invalid count)"),
+    ("RPOP non_existent_list", None),
     # 测试空列表的多元素RPOP
-    response = send_command(sock, "RPOP non_existent_list 2")
-    assert_response(response, "-", "RPOP non_existent_list 2")
-    
+    ("RPOP non_existent_list 2", None),
     # 测试无效的count参数
-    response = send_command(sock, "RPOP mylist abc")
-    assert_response(response, "-", "RPOP mylist abc (invalid count)")
-    
+    ("RPOP mylist abc", RespError, "RPOP mylist abc (invalid count)"),
     # 测试删除整个列表键
-    response = send_command(sock, "DEL mylist")
-    assert_response(response, "1", "DEL mylist")
-    
-    response = send_command(sock, "EXISTS mylist")
-    assert_response(response, "0", "EXISTS mylist (after DEL)")
+    ("DEL mylist", 1),
+    ("EXISTS mylist", 0, "EXISTS mylist (after DEL)"),
+])
 
-def test_datatype_set(sock):
-    """测试集合数据类型相关命令"""
-    print("=" * 50)
-    print("测试集合数据类型相关命令")
-    print("=" * 50)
-    
+def test_datatype_list(reader):
+    """测试列表数据类型相关命令"""
+    print_header("测试列表数据类型相关命令")
+
+    run_script(reader, SCRIPT_LIST)
+
+SCRIPT_SET = compile_script([
+    # 清除上一次中断的运行可能遗留的键
+    ("DEL myset", ANY),
     # 测试SADD - 添加单个元素
-    response = send_command(sock, "SADD myset a")
-    assert_response(response, "1", "SADD myset a")
-    
-    response = send_command(sock, "SADD myset b")
-    assert_response(response, "1", "SADD myset b")
-    
-    response = send_command(sock, "SADD myset c")
-    assert_response(response, "1", "SADD myset c")
-    
+    ("SADD myset a", 1),
+    ("SADD myset b", 1),
+    ("SADD myset c", 1),
     # 测试SADD - 添加多个元素
-    response = send_command(sock, "SADD myset d e")
-    assert_response(response, "2", "SADD myset d e")
-    
+    ("SADD myset d e", 2),
     # 测试SADD - 添加已存在的元素
-    response = send_command(sock, "SADD myset a")
-    assert_response(response, "0", "SADD myset a (existing element)")
-    
+    ("SADD myset a", 0, "SADD myset a (existing element)"),
     # 测试SCARD - 获取集合大小
-    response = send_command(sock, "SCARD myset")
-    assert_response(response, "5", "SCARD myset")
-    
+    ("SCARD myset", 5),
     # 测试SISMEMBER - 检查元素是否存在
-    response = send_command(sock, "SISMEMBER myset a")
-    assert_response(response, "1", "SISMEMBER myset a")
-    
-    response = send_command(sock, "SISMEMBER myset z")
-    assert_response(response, "0", "SISMEMBER myset z (non-existent element)")
-    
+    ("SISMEMBER myset a", 1),
+    ("SISMEMBER myset z", 0, "SISMEMBER myset z (non-existent element)"),
     # 测试SMEMBERS - 获取所有元素
-    response = send_command(sock, "SMEMBERS myset")
-    # 验证所有元素都在响应中
-    for element in ["a", "b", "c", "d", "e"]:
-        assert_response(response, element, "SMEMBERS myset")
-    
+    ("SMEMBERS myset", {b"a", b"b", b"c", b"d", b"e"}),
     # 测试SREM - 删除单个元素
-    response = send_command(sock, "SREM myset a")
-    assert_response(response, "1", "SREM myset a")
-    
-    response = send_command(sock, "SCARD myset")
-    assert_response(response, "4", "SCARD myset (after SREM a)")
-    
-    response = send_command(sock, "SISMEMBER myset a")
-    assert_response(response, "0", "SISMEMBER myset a (after SREM)")
-    
+    ("SREM myset a", 1),
+    ("SCARD myset", 4, "SCARD myset (after SREM a)"),
+    ("SISMEMBER myset a", 0, "SISMEMBER myset a (after SREM)"),
     # 测试SREM - 删除多个元素
-    response = send_command(sock, "SREM myset b c")
-    assert_response(response, "2", "SREM myset b c")
-    
-    response = send_command(sock, "SCARD myset")
-    assert_response(response, "2", "SCARD myset (after SREM b c)")
-    
+    ("SREM myset b c", 2),
+    ("SCARD myset", 2, "SCARD myset (after SREM b c)"),
     # 测试SREM - 删除不存在的元素
-    response = send_command(sock, "SREM myset z")
-    assert_response(response, "0", "SREM myset z (non-existent element)")
-    
+    ("SREM myset z", 0, "SREM myset z (non-existent element)"),
     # 测试空集合
-    response = send_command(sock, "SCARD non_existent_set")
-    assert_response(response, "0", "SCARD non_existent_set")
-    
-    response = send_command(sock, "SISMEMBER non_existent_set a")
-    assert_response(response, "0", "SISMEMBER non_existent_set a")
-    
-    response = send_command(sock, "SMEMBERS non_existent_set")
-    assert_response(response, "*0", "SMEMBERS non_existent_set")
-    
+    ("SCARD non_existent_set", 0),
+    ("SISMEMBER non_existent_set a", 0),
+    ("SMEMBERS non_existent_set", []),
     # 测试删除整个集合键
-    response = send_command(sock, "DEL myset")
-    assert_response(response, "1", "DEL myset")
-    
-    response = send_command(sock, "EXISTS myset")
-    assert_response(response, "0", "EXISTS myset (after DEL)")
+    ("DEL myset", 1),
+    ("EXISTS myset", 0, "EXISTS myset (after DEL)"),
+])
 
-def test_datatype_zset(sock):
-    """测试有序集合数据类型相关命令"""
-    print("=" * 50)
-    print("测试有序集合数据类型相关命令")
-    print("=" * 50)
-    
+def test_datatype_set(reader):
+    """测试集合数据类型相关命令"""
+    print_header("测试集合数据类型相关命令")
+
+    run_script(reader, SCRIPT_SET)
+
+SCRIPT_ZSET = compile_script([
+    # 清除上一次中断的运行可能遗留的键
+    ("DEL myzset", ANY),
     # 测试ZADD - 添加单个元素
-    response = send_command(sock, "ZADD myzset 10 member1")
-    assert_response(response, "1", "ZADD myzset 10 member1")
-    
+    ("ZADD myzset 10 member1", 1),
     # 测试ZADD - 添加多个元素
-    response = send_command(sock, "ZADD myzset 20 member2 30 member3")
-    assert_response(response, "2", "ZADD myzset 20 member2 30 member3")
-    
+    ("ZADD myzset 20 member2 30 member3", 2),
     # 测试ZADD - 添加已存在的元素（更新分数）
-    response = send_command(sock, "ZADD myzset 15 member1")
-    assert_response(response, "1", "ZADD myzset 15 member1 (update)")
-    
+    ("ZADD myzset 15 member1", 1, "ZADD myzset 15 member1 (update)"),
     # 测试ZCARD - 获取集合大小
-    response = send_command(sock, "ZCARD myzset")
-    assert_response(response, "3", "ZCARD myzset")
-    
+    ("ZCARD myzset", 3),
     # 测试ZSCORE - 获取元素的分数
-    response = send_command(sock, "ZSCORE myzset member1")
-    assert_response(response, "15", "ZSCORE myzset member1")
-    
+    ("ZSCORE myzset member1", 15.0),
     # 测试ZSCORE - 不存在的元素
-    response = send_command(sock, "ZSCORE myzset member4")
-    assert_response(response, "-1", "ZSCORE myzset member4 (non-existent)")
-    
+    ("ZSCORE myzset member4", None, "ZSCORE myzset member4 (non-existent)"),
     # 测试ZISMEMBER - 检查元素是否存在
-    response = send_command(sock, "ZISMEMBER myzset member1")
-    assert_response(response, "1", "ZISMEMBER myzset member1")
-    
-    response = send_command(sock, "ZISMEMBER myzset member4")
-    assert_response(response, "0", "ZISMEMBER myzset member4 (non-existent)")
-    
+    ("ZISMEMBER myzset member1", 1),
+    ("ZISMEMBER myzset member4", 0, "ZISMEMBER myzset member4 (non-existent)"),
     # 测试ZRANK - 获取元素的排名（升序）
-    response = send_command(sock, "ZRANK myzset member1")
-    assert_response(response, "0", "ZRANK myzset member1")
-    
-    response = send_command(sock, "ZRANK myzset member2")
-    assert_response(response, "1", "ZRANK myzset member2")
-    
-    response = send_command(sock, "ZRANK myzset member3")
-    assert_response(response, "2", "ZRANK myzset member3")
-    
+    ("ZRANK myzset member1", 0),
+    ("ZRANK myzset member2", 1),
+    ("ZRANK myzset member3", 2),
     # 测试ZREVRANK - 获取元素的逆序排名（降序）
-    response = send_command(sock, "ZREVRANK myzset member3")
-    assert_response(response, "0", "ZREVRANK myzset member3")
-    
-    response = send_command(sock, "ZREVRANK myzset member2")
-    assert_response(response, "1", "ZREVRANK myzset member2")
-    
-    response = send_command(sock, "ZREVRANK myzset member1")
-    assert_response(response, "2", "ZREVRANK myzset member1")
-    
+    ("ZREVRANK myzset member3", 0),
+    ("ZREVRANK myzset member2", 1),
+    ("ZREVRANK myzset member1", 2),
     # 测试ZRANGE - 获取指定范围的元素（升序）
-    response = send_command(sock, "ZRANGE myzset 0 -1")
-    assert_response(response, "member1", "ZRANGE myzset 0 -1")
-    assert_response(response, "member2", "ZRANGE myzset 0 -1")
-    assert_response(response, "member3", "ZRANGE myzset 0 -1")
-    
+    ("ZRANGE myzset 0 -1", [b"member1", b"member2", b"member3"]),
     # 测试ZREVRANGE - 获取指定范围的元素（降序）
-    response = send_command(sock, "ZREVRANGE myzset 0 -1")
-    assert_response(response, "member3", "ZREVRANGE myzset 0 -1")
-    assert_response(response, "member2", "ZREVRANGE myzset 0 -1")
-    assert_response(response, "member1", "ZREVRANGE myzset 0 -1")
-    
+    ("ZREVRANGE myzset 0 -1", [b"member3", b"member2", b"member1"]),
     # 测试ZRANGEBYSCORE - 按分数范围获取元素
-    response = send_command(sock, "ZRANGEBYSCORE myzset 10 25")
-    assert_response(response, "member1", "ZRANGEBYSCORE myzset 10 25")
-    assert_response(response, "member2", "ZRANGEBYSCORE myzset 10 25")
-    
+    ("ZRANGEBYSCORE myzset 10 25", [b"member1", b"member2"]),
     # 测试ZREVRANGEBYSCORE - 按分数范围逆序获取元素
-    response = send_command(sock, "ZREVRANGEBYSCORE myzset 25 10")
-    assert_response(response, "member2", "ZREVRANGEBYSCORE myzset 25 10")
-    assert_response(response, "member1", "ZREVRANGEBYSCORE myzset 25 10")
-    
+    ("ZREVRANGEBYSCORE myzset 25 10", [b"member2", b"member1"]),
     # 测试ZCOUNT - 统计分数在指定范围内的元素个数
-    response = send_command(sock, "ZCOUNT myzset 10 25")
-    assert_response(response, "2", "ZCOUNT myzset 10 25")
-    
+    ("ZCOUNT myzset 10 25", 2),
     # 测试ZREM - 删除单个元素
-    response = send_command(sock, "ZREM myzset member2")
-    assert_response(response, "1", "ZREM myzset member2")
-    
-    response = send_command(sock, "ZCARD myzset")
-    assert_response(response, "2", "ZCARD myzset (after ZREM)")
-    
+    ("ZREM myzset member2", 1),
+    ("ZCARD myzset", 2, "ZCARD myzset (after ZREM)"),
     # 测试ZREM - 删除多个元素
-    response = send_command(sock, "ZREM myzset member1 member3")
-    assert_response(response, "2", "ZREM myzset member1 member3")
-    
-    response = send_command(sock, "ZCARD myzset")
-    assert_response(response, "0", "ZCARD myzset (after multi ZREM)")
-    
+    ("ZREM myzset member1 member3", 2),
+    ("ZCARD myzset", 0, "ZCARD myzset (after multi ZREM)"),
     # 测试空集合
-    response = send_command(sock, "ZCARD non_existent_zset")
-    assert_response(response, "0", "ZCARD non_existent_zset")
-    
+    ("ZCARD non_existent_zset", 0),
     # 测试删除整个有序集合键
-    response = send_command(sock, "DEL myzset")
-    assert_response(response, "1", "DEL myzset")
-    
-    response = send_command(sock, "EXISTS myzset")
-    assert_response(response, "0", "EXISTS myzset (after DEL)")
+    ("DEL myzset", 1),
+    ("EXISTS myzset", 0, "EXISTS myzset (after DEL)"),
+])
 
-def test_server_management(sock):
-    """测试服务器管理相关命令"""
-    print("=" * 50)
-    print("测试服务器管理相关命令")
-    print("=" * 50)
-    
+def test_datatype_zset(reader):
+    """测试有序集合数据类型相关命令"""
+    print_header("测试有序集合数据类型相关命令")
+
+    run_script(reader, SCRIPT_ZSET)
+
+SCRIPT_SERVER_MANAGEMENT = compile_script([
     # 测试DBSIZE命令 - 获取数据库中的键数量
-    initial_size = send_command(sock, "DBSIZE")
-    # 初始大小应该是一个数字
-    assert any(char.isdigit() for char in initial_size), "DBSIZE返回值应该是一个数字"
-    
+    ("DBSIZE", int),
     # 创建一些键，用于后续测试
-    response = send_command(sock, "SET test_key1 value1")
-    assert_response(response, "OK", "SET test_key1 value1")
-    
-    response = send_command(sock, "SET test_key2 value2")
-    assert_response(response, "OK", "SET test_key2 value2")
-    
-    response = send_command(sock, "HSET user1 name Alice")
-    assert_response(response, "1", "HSET user1 name Alice")
-    
+    ("SET test_key1 value1", b"OK"),
+    ("SET test_key2 value2", b"OK"),
+    ("HSET user1 name Alice", 1),
     # 再次测试DBSIZE，应该返回增加的键数量
-    new_size = send_command(sock, "DBSIZE")
-    # 新大小应该比初始大小大3
-    assert any(char.isdigit() for char in new_size), "DBSIZE返回值应该是一个数字"
-    
-    # 测试INFO命令 - 获取服务器信息
-    response = send_command(sock, "INFO")
-    # INFO响应应该包含一些服务器信息
-    assert len(response) > 0, "INFO命令返回的响应不应该为空"
-    
+    ("DBSIZE", int),
+    # 测试INFO命令 - 获取服务器信息，响应应该包含一些服务器信息
+    ("INFO", bytes),
     # 测试FLUSHDB命令 - 清空数据库
-    response = send_command(sock, "FLUSHDB")
-    assert_response(response, "OK", "FLUSHDB")
-    
+    ("FLUSHDB", b"OK"),
     # 验证数据库是否已清空
-    response = send_command(sock, "DBSIZE")
-    # 清空后大小应该是0或者接近初始大小
-    assert_response(response, "0" if "0" in response else initial_size.strip(), "DBSIZE (after FLUSHDB)")
-    
-    response = send_command(sock, "EXISTS test_key1")
-    assert_response(response, "0", "EXISTS test_key1 (after FLUSHDB)")
-    
-    response = send_command(sock, "EXISTS test_key2")
-    assert_response(response, "0", "EXISTS test_key2 (after FLUSHDB)")
-    
-    response = send_command(sock, "EXISTS user1")
-    assert_response(response, "0", "EXISTS user1 (after FLUSHDB)")
-
-def test_datatype_bitmap(sock):
-    """测试位图数据类型相关命令"""
-    print("=" * 50)
-    print("测试位图数据类型相关命令")
-    print("=" * 50)
-    
+    ("DBSIZE", 0, "DBSIZE (after FLUSHDB)"),
+    ("EXISTS test_key1", 0, "EXISTS test_key1 (after FLUSHDB)"),
+    ("EXISTS test_key2", 0, "EXISTS test_key2 (after FLUSHDB)"),
+    ("EXISTS user1", 0, "EXISTS user1 (after FLUSHDB)"),
+])
+
+def test_server_management(reader):
+    """测试服务器管理相关命令"""
+    print_header("测试服务器管理相关命令")
+
+    run_script(reader, SCRIPT_SERVER_MANAGEMENT)
+
+SCRIPT_BITMAP = compile_script([
+    # 清除上一次中断的运行可能遗留的键
+    ("DEL bitmap_key bitmap_key2 bitmap_result bitmap_result2 bitmap_result3 bitmap_result4", ANY),
     # 测试SETBIT和GETBIT
-    response = send_command(sock, "SETBIT bitmap_key 0 1")
-    assert_response(response, "0", "SETBIT bitmap_key 0 1 (初始设置)")
-    
-    response = send_command(sock, "GETBIT bitmap_key 0")
-    assert_response(response, "1", "GETBIT bitmap_key 0")
-    
+    ("SETBIT bitmap_key 0 1", 0, "SETBIT bitmap_key 0 1 (初始设置)"),
+    ("GETBIT bitmap_key 0", 1),
     # 测试更新已设置的位
-    response = send_command(sock, "SETBIT bitmap_key 0 0")
-    assert_response(response, "1", "SETBIT bitmap_key 0 0 (更新)")
-    
-    response = send_command(sock, "GETBIT bitmap_key 0")
-    assert_response(response, "0", "GETBIT bitmap_key 0 (更新后)")
-    
+    ("SETBIT bitmap_key 0 0", 1, "SETBIT bitmap_key 0 0 (更新)"),
+    ("GETBIT bitmap_key 0", 0, "GETBIT bitmap_key 0 (更新后)"),
     # 测试多个位的设置
-    response = send_command(sock, "SETBIT bitmap_key 1 1")
-    assert_response(response, "0", "SETBIT bitmap_key 1 1")
-    
-    response = send_command(sock, "SETBIT bitmap_key 5 1")
-    assert_response(response, "0", "SETBIT bitmap_key 5 1")
-    
-    response = send_command(sock, "SETBIT bitmap_key 10 1")
-    assert_response(response, "0", "SETBIT bitmap_key 10 1")
-    
+    ("SETBIT bitmap_key 1 1", 0),
+    ("SETBIT bitmap_key 5 1", 0),
+    ("SETBIT bitmap_key 10 1", 0),
     # 测试BITCOUNT
-    response = send_command(sock, "BITCOUNT bitmap_key")
-    assert_response(response, "3", "BITCOUNT bitmap_key (整个位图)")
-    
+    ("BITCOUNT bitmap_key", 3, "BITCOUNT bitmap_key (整个位图)"),
     # 测试BITCOUNT范围
-    response = send_command(sock, "BITCOUNT bitmap_key 0 0")
     # 第一个字节包含位0-7，其中位1和5是1，所以应该返回2
-    assert_response(response, "2", "BITCOUNT bitmap_key 0 0 (第一个字节)")
-    
+    ("BITCOUNT bitmap_key 0 0", 2, "BITCOUNT bitmap_key 0 0 (第一个字节)"),
     # 测试BITCOUNT大范围
-    response = send_command(sock, "BITCOUNT bitmap_key 0 2")
     # 字节0-2应该包含所有设置的位，所以应该返回3
-    assert_response(response, "3", "BITCOUNT bitmap_key 0 2 (多个字节)")
-    
+    ("BITCOUNT bitmap_key 0 2", 3, "BITCOUNT bitmap_key 0 2 (多个字节)"),
     # 测试BITOP命令
     # 准备另一个位图
-    response = send_command(sock, "SETBIT bitmap_key2 1 1")
-    assert_response(response, "0", "SETBIT bitmap_key2 1 1")
-    
-    response = send_command(sock, "SETBIT bitmap_key2 2 1")
-    assert_response(response, "0", "SETBIT bitmap_key2 2 1")
-    
-    response = send_command(sock, "SETBIT bitmap_key2 10 1")
-    assert_response(response, "0", "SETBIT bitmap_key2 10 1")
-    
+    ("SETBIT bitmap_key2 1 1", 0),
+    ("SETBIT bitmap_key2 2 1", 0),
+    ("SETBIT bitmap_key2 10 1", 0),
     # 测试BITOP AND
-    response = send_command(sock, "BITOP AND bitmap_result bitmap_key bitmap_key2")
-    # 返回结果应该是位图的大小（字节数），取决于最大的偏移量
-    assert any(char.isdigit() for char in response), "BITOP AND返回值应该是一个数字"
-    
+    # 返回值应该是一个数字
+    ("BITOP AND bitmap_result bitmap_key bitmap_key2", int),
     # 验证AND操作结果
     # bitmap_key和bitmap_key2在位1和位10都设置为1，所以这些位在结果中应该是1
-    response = send_command(sock, "GETBIT bitmap_result 1")
-    assert_response(response, "1", "GETBIT bitmap_result 1 (AND结果)")
-    
-    response = send_command(sock, "GETBIT bitmap_result 10")
-    assert_response(response, "1", "GETBIT bitmap_result 10 (AND结果)")
-    
+    ("GETBIT bitmap_result 1", 1, "GETBIT bitmap_result 1 (AND结果)"),
+    ("GETBIT bitmap_result 10", 1, "GETBIT bitmap_result 10 (AND结果)"),
     # 其他位应该是0
-    response = send_command(sock, "GETBIT bitmap_result 5")
-    assert_response(response, "0", "GETBIT bitmap_result 5 (AND结果)")
-    
-    response = send_command(sock, "GETBIT bitmap_result 2")
-    assert_response(response, "0", "GETBIT bitmap_result 2 (AND结果)")
-    
+    ("GETBIT bitmap_result 5", 0, "GETBIT bitmap_result 5 (AND结果)"),
+    ("GETBIT bitmap_result 2", 0, "GETBIT bitmap_result 2 (AND结果)"),
     # 测试BITOP OR
-    response = send_command(sock, "BITOP OR bitmap_result2 bitmap_key bitmap_key2")
-    assert any(char.isdigit() for char in response), "BITOP OR返回值应该是一个数字"
-    
+    ("BITOP OR bitmap_result2 bitmap_key bitmap_key2", int),
     # 验证OR操作结果
-    response = send_command(sock, "GETBIT bitmap_result2 1")
-    assert_response(response, "1", "GETBIT bitmap_result2 1 (OR结果)")
-    
-    response = send_command(sock, "GETBIT bitmap_result2 2")
-    assert_response(response, "1", "GETBIT bitmap_result2 2 (OR结果)")
-    
-    response = send_command(sock, "GETBIT bitmap_result2 5")
-    assert_response(response, "1", "GETBIT bitmap_result2 5 (OR结果)")
-    
-    response = send_command(sock, "GETBIT bitmap_result2 10")
-    assert_response(response, "1", "GETBIT bitmap_result2 10 (OR结果)")
-    
+    ("GETBIT bitmap_result2 1", 1, "GETBIT bitmap_result2 1 (OR结果)"),
+    ("GETBIT bitmap_result2 2", 1, "GETBIT bitmap_result2 2 (OR结果)"),
+    ("GETBIT bitmap_result2 5", 1, "GETBIT bitmap_result2 5 (OR结果)"),
+    ("GETBIT bitmap_result2 10", 1, "GETBIT bitmap_result2 10 (OR结果)"),
     # 测试BITOP XOR
-    response = send_command(sock, "BITOP XOR bitmap_result3 bitmap_key bitmap_key2")
-    assert any(char.isdigit() for char in response), "BITOP XOR返回值应该是一个数字"
-    
+    ("BITOP XOR bitmap_result3 bitmap_key bitmap_key2", int),
     # 验证XOR操作结果
     # bitmap_key和bitmap_key2在位1和位10都为1，所以这些位在XOR结果中应该是0
-    response = send_command(sock, "GETBIT bitmap_result3 1")
-    assert_response(response, "0", "GETBIT bitmap_result3 1 (XOR结果)")
-    
-    response = send_command(sock, "GETBIT bitmap_result3 10")
-    assert_response(response, "0", "GETBIT bitmap_result3 10 (XOR结果)")
-    
+    ("GETBIT bitmap_result3 1", 0, "GETBIT bitmap_result3 1 (XOR结果)"),
+    ("GETBIT bitmap_result3 10", 0, "GETBIT bitmap_result3 10 (XOR结果)"),
     # bitmap_key在位5为1，bitmap_key2在位2为1，所以这些位在XOR结果中应该是1
-    response = send_command(sock, "GETBIT bitmap_result3 5")
-    assert_response(response, "1", "GETBIT bitmap_result3 5 (XOR结果)")
-    
-    response = send_command(sock, "GETBIT bitmap_result3 2")
-    assert_response(response, "1", "GETBIT bitmap_result3 2 (XOR结果)")
-    
+    ("GETBIT bitmap_result3 5", 1, "GETBIT bitmap_result3 5 (XOR结果)"),
+    ("GETBIT bitmap_result3 2", 1, "GETBIT bitmap_result3 2 (XOR结果)"),
     # 测试BITOP NOT
-    response = send_command(sock, "BITOP NOT bitmap_result4 bitmap_key")
-    assert any(char.isdigit() for char in response), "BITOP NOT返回值应该是一个数字"
-    
+    ("BITOP NOT bitmap_result4 bitmap_key", int),
     # 验证NOT操作结果
-    response = send_command(sock, "GETBIT bitmap_result4 0")
-    assert_response(response, "1", "GETBIT bitmap_result4 0 (NOT结果)")
-    
-    response = send_command(sock, "GETBIT bitmap_result4 1")
-    assert_response(response, "0", "GETBIT bitmap_result4 1 (NOT结果)")
-    
+    ("GETBIT bitmap_result4 0", 1, "GETBIT bitmap_result4 0 (NOT结果)"),
+    ("GETBIT bitmap_result4 1", 0, "GETBIT bitmap_result4 1 (NOT结果)"),
     # 测试参数错误情况
-    response = send_command(sock, "SETBIT invalid_key")
-    assert_response(response, "-", "SETBIT invalid_key (参数不足)")
-    
-    response = send_command(sock, "GETBIT invalid_key")
-    assert_response(response, "-", "GETBIT invalid_key (参数不足)")
-    
-    response = send_command(sock, "BITOP UNKNOWN dest_key src_key1 src_key2")
-    assert_response(response, "-", "BITOP UNKNOWN (不支持的操作)")
-    
+    ("SETBIT invalid_key", RespError, "SETBIT invalid_key (参数不足)"),
+    ("GETBIT invalid_key", RespError, "GETBIT invalid_key (参数不足)"),
+    ("BITOP UNKNOWN dest_key src_key1 src_key2", RespError, "BITOP UNKNOWN (不支持的操作)"),
     # 清理测试数据
-    response = send_command(sock, "DEL bitmap_key bitmap_key2 bitmap_result bitmap_result2 bitmap_result3 bitmap_result4")
+    ("DEL bitmap_key bitmap_key2 bitmap_result bitmap_result2 bitmap_result3 bitmap_result4", ANY),
+])
 
+def test_datatype_bitmap(reader):
+    """测试位图数据类型相关命令"""
+    print_header("测试位图数据类型相关命令")
 
-def test_datatype_hyperloglog(sock):
-    """测试HyperLogLog数据类型相关命令"""
-    print("=" * 50)
-    print("测试HyperLogLog数据类型相关命令")
-    print("=" * 50)
-    
+    run_script(reader, SCRIPT_BITMAP)
+
+
+SCRIPT_HYPERLOGLOG = compile_script([
+    # 清除上一次中断的运行可能遗留的键
+    ("DEL hll_key hll_key2 hll_merged", ANY),
     # 测试PFADD命令 - 添加单个元素
-    response = send_command(sock, "PFADD hll_key element1")
-    assert_response(response, "1", "PFADD hll_key element1")
-    
+    ("PFADD hll_key element1", 1),
     # 测试PFADD命令 - 添加多个元素
-    response = send_command(sock, "PFADD hll_key element2 element3")
-    assert_response(response, "1", "PFADD hll_key element2 element3")
-    
+    ("PFADD hll_key element2 element3", 1),
     # 测试PFADD命令 - 添加已存在的元素
-    response = send_command(sock, "PFADD hll_key element1")
-    assert_response(response, "0", "PFADD hll_key element1 (existing element)")
-    
+    ("PFADD hll_key element1", 0, "PFADD hll_key element1 (existing element)"),
     # 测试PFCOUNT命令
-    response = send_command(sock, "PFCOUNT hll_key")
     # HyperLogLog是概率数据结构，结果可能不准确，但应该接近3
-    # 解析RESP协议格式的响应 (形如 $1\r\n3\r\n)
-    count = response.strip()
-    # 提取数字部分
-    if count.startswith('$') and '\r\n' in count:
-        parts = count.split('\r\n')
-        if len(parts) >= 2:
-            count = parts[1]
-    
-    if count.isdigit():
-        count_val = int(count)
-        assert count_val > 0 and count_val <= 6, f"PFCOUNT返回值应该接近3，但得到了{count_val}"
-        print(f"✅ PFCOUNT测试通过，计数: {count_val}")
-    else:
-        assert False, f"PFCOUNT返回了非数字值: {count}"
-    print()
-    
+    ("PFCOUNT hll_key", range(1, 7)),
     # 创建第二个HyperLogLog用于合并测试
-    response = send_command(sock, "PFADD hll_key2 element4 element5")
-    assert_response(response, "1", "PFADD hll_key2 element4 element5")
-    
+    ("PFADD hll_key2 element4 element5", 1),
     # 测试PFMERGE命令
-    response = send_command(sock, "PFMERGE hll_merged hll_key hll_key2")
-    assert_response(response, "OK", "PFMERGE hll_merged hll_key hll_key2")
-    
-    # 验证合并后的计数
-    response = send_command(sock, "PFCOUNT hll_merged")
-    # 合并后的计数应该大于或等于原始计数
-    merged_count = response.strip()
-    # 解析RESP协议格式的响应
-    if merged_count.startswith('$') and '\r\n' in merged_count:
-        parts = merged_count.split('\r\n')
-        if len(parts) >= 2:
-            merged_count = parts[1]
-    
-    if merged_count.isdigit():
-        merged_count_val = int(merged_count)
-        assert merged_count_val > 0 and merged_count_val <= 10, f"合并后的PFCOUNT返回值应该接近5，但得到了{merged_count_val}"
-        print(f"✅ 合并后的PFCOUNT测试通过，计数: {merged_count_val}")
-    else:
-        assert False, f"合并后的PFCOUNT返回了非数字值: {merged_count}"
-    print()
-    
-    # 测试PFCOUNT命令多参数功能
-    response = send_command(sock, "PFCOUNT hll_key hll_key2")
-    # 多参数PFCOUNT应该返回合并后的近似计数
-    multi_count = response.strip()
-    # 解析RESP协议格式的响应
-    if multi_count.startswith('$') and '\r\n' in multi_count:
-        parts = multi_count.split('\r\n')
-        if len(parts) >= 2:
-            multi_count = parts[1]
-    
-    if multi_count.isdigit():
-        multi_count_val = int(multi_count)
-        assert multi_count_val > 0 and multi_count_val <= 10, f"多参数PFCOUNT返回值应该接近5，但得到了{multi_count_val}"
-        print(f"✅ 多参数PFCOUNT测试通过，计数: {multi_count_val}")
-    else:
-        assert False, f"多参数PFCOUNT返回了非数字值: {multi_count}"
-    print()
-    
-    # 测试空HyperLogLog
-    response = send_command(sock, "PFCOUNT non_existent_hll")
-    # 解析RESP协议格式的响应
-    parsed_response = response.strip()
-    if parsed_response.startswith('$') and '\r\n' in parsed_response:
-        parts = parsed_response.split('\r\n')
-        if len(parts) >= 2:
-            parsed_response = parts[1]
-    
-    # 对于空HyperLogLog，响应应该是0
-    assert_response(parsed_response, "0", "PFCOUNT non_existent_hll")
-    
+    ("PFMERGE hll_merged hll_key hll_key2", b"OK"),
+    # 验证合并后的计数，应该接近5
+    ("PFCOUNT hll_merged", range(1, 11)),
+    # 测试PFCOUNT命令多参数功能，应该返回合并后的近似计数
+    ("PFCOUNT hll_key hll_key2", range(1, 11)),
+    # 测试空HyperLogLog，响应应该是0
+    ("PFCOUNT non_existent_hll", 0),
     # 测试参数错误情况
-    response = send_command(sock, "PFADD invalid_key")
-    assert_response(response, "-", "PFADD invalid_key (参数不足)")
-    
-    response = send_command(sock, "PFCOUNT invalid_key invalid_key2")
+    ("PFADD invalid_key", RespError, "PFADD invalid_key (参数不足)"),
     # 即使键不存在，多参数PFCOUNT也应该返回一个有效的数字
-    count = response.strip()
-    # 解析RESP协议格式的响应
-    if count.startswith('$') and '\r\n' in count:
-        parts = count.split('\r\n')
-        if len(parts) >= 2:
-            count = parts[1]
-    
-    assert count.isdigit(), f"多参数PFCOUNT对于不存在的键应该返回数字，但得到了{count}"
-    
-    response = send_command(sock, "PFMERGE invalid_dest")
-    assert_response(response, "-", "PFMERGE invalid_dest (参数不足)")
-    
+    ("PFCOUNT invalid_key invalid_key2", int),
+    ("PFMERGE invalid_dest", RespError, "PFMERGE invalid_dest (参数不足)"),
     # 清理测试数据
-    response = send_command(sock, "DEL hll_key hll_key2 hll_merged")
+    ("DEL hll_key hll_key2 hll_merged", ANY),
+])
+
+def test_datatype_hyperloglog(reader):
+    """测试HyperLogLog数据类型相关命令"""
+    print_header("测试HyperLogLog数据类型相关命令")
 
+    run_script(reader, SCRIPT_HYPERLOGLOG)
+
+
+def connect_server():
+    """连接到DKV服务器"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    # 请求-响应式的小包交互，关闭Nagle算法避免发送被延迟；
+    # 增大接收缓冲区，使流水线的批量响应不必等待客户端读取
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+    # 阻塞模式读写，但设置超时，避免服务器丢失响应时测试永远挂起
+    sock.settimeout(30)
+    sock.connect(('localhost', 6379))
+    return sock
+
+def run_on_new_connection(test, output=None):
+    """在单独的连接上运行一组测试，output不为None时该组的输出写入output"""
+    _output.buffer = output
+    try:
+        with connect_server() as sock:
+            test(RespReader(sock))
+    finally:
+        _output.buffer = None
 
 def test_dkv_server():
     """测试DKV服务器"""
     try:
-        # 连接到服务器
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.connect(('localhost', 6379))
-        print("已连接到DKV服务器")
-        
-        # 运行不同类型的测试
-        test_basic(sock)
-        test_datatype_string(sock)
-        test_datatype_hash(sock)
-        test_datatype_list(sock)
-        test_datatype_set(sock)
-        test_datatype_zset(sock)
-        test_datatype_bitmap(sock)
-        test_datatype_hyperloglog(sock)
-        test_server_management(sock)
-        
+        # 各组数据类型测试使用互不相同的键，在各自的连接上并发运行
+        parallel_tests = [
+            test_basic,
+            test_datatype_string,
+            test_datatype_hash,
+            test_datatype_list,
+            test_datatype_set,
+            test_datatype_zset,
+            test_datatype_bitmap,
+            test_datatype_hyperloglog,
+        ]
+        outputs = [io.StringIO() for _ in parallel_tests]
+        with ThreadPoolExecutor(max_workers=len(parallel_tests)) as executor:
+            futures = [executor.submit(run_on_new_connection, test, output)
+                       for test, output in zip(parallel_tests, outputs)]
+            for future, output in zip(futures, outputs):
+                try:
+                    future.result()
+                finally:
+                    # 按测试组的顺序打印各组的输出，避免并发运行时输出相互交错
+                    print(output.getvalue(), end="")
+
+        # FLUSHDB会清空整个数据库，必须等其他测试结束后再运行
+        run_on_new_connection(test_server_management)
+
         print("所有测试完成！")
-        
+
     except ConnectionRefusedError:
         print("无法连接到DKV服务器，请确保服务器正在运行")
         sys.exit(1)
     except AssertionError as e:
         print(f"断言失败: {e}")
         sys.exit(1)
+    except socket.timeout:
+        print("等待服务器响应超时")
+        sys.exit(1)
     except Exception as e:
         print(f"测试过程中出现错误: {e}")
         sys.exit(1)
-    finally:
-        if 'sock' in locals():
-            sock.close()
 
 if __name__ == "__main__":
     test_dkv_server()
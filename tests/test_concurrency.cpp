@@ -1,6 +1,8 @@
 #include "dkv_core.hpp"
 #include "storage/dkv_storage.hpp"
 #include "dkv_datatypes.hpp"
+#include "dkv_server.hpp"
+#include "net/dkv_resp.hpp"
 #include "test_runner.hpp"
 #include <iostream>
 #include <thread>
@@ -9,6 +11,11 @@
 #include <atomic>
 #include <functional>
 #include <string>
+#include <sys/socket.h>
+#include <sys/time.h>
+#include <netinet/in.h>
+#include <arpa/inet.h>
+#include <unistd.h>
 using namespace std;
 namespace dkv {
 
@@ -367,6 +374,97 @@ bool testHighConcurrencyPerformance() {
     return true;
 }
 
+// 测试流水线请求的响应顺序：多个客户端同时在各自的连接上一次性发送大量GET命令，
+// 读取的是互不相同的键，命令可以并行执行，但每个连接收到的响应必须与命令顺序一致
+bool testPipelinedRepliesInOrder() {
+    const int PORT = 6397;
+    const int NUM_CLIENTS = 4;
+    const int COMMANDS_PER_CLIENT = 1000;
+    const int ROUNDS = 10;
+    
+    DKVServer server(PORT);
+    server.setRDBEnabled(false);
+    server.setAOFEnabled(false);
+    ASSERT_TRUE(server.start());
+    this_thread::sleep_for(chrono::milliseconds(100));
+    
+    // 编码RESP数组格式的命令
+    auto encode = [](const vector<string>& parts) {
+        string out = "*" + to_string(parts.size()) + "\r\n";
+        for (const auto& part : parts) {
+            out += "$" + to_string(part.size()) + "\r\n" + part + "\r\n";
+        }
+        return out;
+    };
+    
+    vector<thread> threads;
+    atomic<int> ordered_clients(0);
+    
+    for (int c = 0; c < NUM_CLIENTS; ++c) {
+        threads.emplace_back([PORT, COMMANDS_PER_CLIENT, ROUNDS, c, &encode, &ordered_clients]() {
+            int sock = socket(AF_INET, SOCK_STREAM, 0);
+            if (sock < 0) {
+                return;
+            }
+            struct timeval timeout = {5, 0};
+            setsockopt(sock, SOL_SOCKET, SO_RCVTIMEO, &timeout, sizeof(timeout));
+            
+            struct sockaddr_in addr;
+            addr.sin_family = AF_INET;
+            addr.sin_port = htons(PORT);
+            addr.sin_addr.s_addr = inet_addr("127.0.0.1");
+            if (connect(sock, (struct sockaddr*)&addr, sizeof(addr)) != 0) {
+                close(sock);
+                return;
+            }
+            
+            // 一次性写出payload，读取到与expected等长的数据后比较
+            auto roundTrip = [sock](const string& payload, const string& expected) {
+                send(sock, payload.c_str(), payload.size(), 0);
+                string received;
+                char buffer[4096];
+                while (received.size() < expected.size()) {
+                    ssize_t n = recv(sock, buffer, sizeof(buffer), 0);
+                    if (n <= 0) {
+                        break;
+                    }
+                    received.append(buffer, n);
+                }
+                return received == expected;
+            };
+            
+            // 先写入每个客户端独立的键，再以流水线方式多次按顺序读取
+            string set_payload, set_expected, get_payload, get_expected;
+            for (int i = 0; i < COMMANDS_PER_CLIENT; ++i) {
+                string key = "pipeline_" + to_string(c) + "_" + to_string(i);
+                string value = "value_" + to_string(i);
+                set_payload += encode({"SET", key, value});
+                set_expected += RESPProtocol::serializeSimpleString("OK");
+                get_payload += encode({"GET", key});
+                get_expected += RESPProtocol::serializeBulkString(value);
+            }
+            
+            bool ordered = roundTrip(set_payload, set_expected);
+            for (int round = 0; ordered && round < ROUNDS; ++round) {
+                ordered = roundTrip(get_payload, get_expected);
+            }
+            if (ordered) {
+                ordered_clients++;
+            }
+            close(sock);
+        });
+    }
+    
+    for (auto& thread : threads) {
+        thread.join();
+    }
+    server.stop();
+    
+    ASSERT_EQ(ordered_clients.load(), NUM_CLIENTS);
+    
+    return true;
+}
+
 } // namespace dkv
 
 int main() {
@@ -384,6 +482,7 @@ int main() {
     runner.runTest("哈希操作并发安全性", testConcurrentHashOperations);
     runner.runTest("列表操作并发安全性", testConcurrentListOperations);
     runner.runTest("高并发性能测试", testHighConcurrencyPerformance);
+    runner.runTest("流水线请求的响应顺序", testPipelinedRepliesInOrder);
     
     // 打印测试总结
     runner.printSummary();
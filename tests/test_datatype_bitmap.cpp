@@ -2,6 +2,7 @@
 #include "dkv_core.hpp"
 #include "dkv_utils.hpp"
 #include "datatypes/dkv_datatype_bitmap.hpp"
+#include "dkv_command_handler.hpp"
 #include "test_runner.hpp"
 #include <iostream>
 #include <cassert>
@@ -175,6 +176,40 @@ bool testBitmapCommands() {
     return true;
 }
 
+// 测试BITOP命令的参数检查：NOT只有一个源键，其余操作可以有多个源键
+bool testBitOpCommandArgs() {
+    StorageEngine storage;
+    CommandHandler handler(&storage, nullptr, false);
+    bool need_inc_dirty = false;
+    
+    assert(storage.setBit(NO_TX, "bitop_src1", 0, true));
+    assert(storage.setBit(NO_TX, "bitop_src2", 1, true));
+    
+    // BITOP NOT destkey srckey 只有3个参数
+    Command not_cmd(CommandType::BITOP, {"NOT", "bitop_not", "bitop_src1"});
+    Response not_resp = handler.handleBitOpCommand(NO_TX, not_cmd, need_inc_dirty);
+    assert(not_resp.status == ResponseStatus::OK);
+    assert(need_inc_dirty);
+    assert(storage.getBit(NO_TX, "bitop_not", 0) == false);
+    
+    // 多个源键的操作
+    need_inc_dirty = false;
+    Command or_cmd(CommandType::BITOP, {"OR", "bitop_or", "bitop_src1", "bitop_src2"});
+    Response or_resp = handler.handleBitOpCommand(NO_TX, or_cmd, need_inc_dirty);
+    assert(or_resp.status == ResponseStatus::OK);
+    assert(need_inc_dirty);
+    assert(storage.bitCount(NO_TX, "bitop_or") == 2);
+    
+    // 缺少源键时返回错误
+    need_inc_dirty = false;
+    Command short_cmd(CommandType::BITOP, {"NOT", "bitop_not"});
+    Response short_resp = handler.handleBitOpCommand(NO_TX, short_cmd, need_inc_dirty);
+    assert(short_resp.status == ResponseStatus::ERROR);
+    assert(!need_inc_dirty);
+    
+    return true;
+}
+
 } // namespace dkv
 
 int main() {
@@ -186,6 +221,7 @@ int main() {
     
     runner.runTest("BitmapItem基本功能", testBitmapItem);
     runner.runTest("Bitmap命令测试", testBitmapCommands);
+    runner.runTest("BITOP命令参数检查", testBitOpCommandArgs);
     
     runner.printSummary();
     
@@ -2,6 +2,7 @@
 #include "storage/dkv_storage.hpp"
 #include "dkv_core.hpp"
 #include "dkv_utils.hpp"
+#include "dkv_command_handler.hpp"
 #include "test_runner.hpp"
 #include <iostream>
 #include <cassert>
@@ -119,6 +120,39 @@ bool testHashCommands() {
     return true;
 }
 
+// 测试HSET命令的返回值：只统计新增的字段，更新已有字段不计入
+bool testHSetCommandAddedCount() {
+    StorageEngine storage;
+    CommandHandler handler(&storage, nullptr, false);
+    bool need_inc_dirty = false;
+    
+    // 全部为新字段
+    Command new_cmd(CommandType::HSET, {"hset_user", "name", "John", "age", "30"});
+    Response new_resp = handler.handleHSetCommand(NO_TX, new_cmd, need_inc_dirty);
+    assert(new_resp.status == ResponseStatus::OK);
+    assert(new_resp.data == "2");
+    assert(need_inc_dirty);
+    
+    // 混合新旧字段，只统计新增的email
+    need_inc_dirty = false;
+    Command mixed_cmd(CommandType::HSET, {"hset_user", "name", "Mike", "email", "mike@example.com"});
+    Response mixed_resp = handler.handleHSetCommand(NO_TX, mixed_cmd, need_inc_dirty);
+    assert(mixed_resp.data == "1");
+    assert(need_inc_dirty);
+    assert(storage.hget(NO_TX, "hset_user", "name") == "Mike");
+    
+    // 只更新已有字段，返回0，但数据仍然被修改
+    need_inc_dirty = false;
+    Command update_cmd(CommandType::HSET, {"hset_user", "age", "31"});
+    Response update_resp = handler.handleHSetCommand(NO_TX, update_cmd, need_inc_dirty);
+    assert(update_resp.data == "0");
+    assert(need_inc_dirty);
+    assert(storage.hget(NO_TX, "hset_user", "age") == "31");
+    assert(storage.hlen(NO_TX, "hset_user") == 3);
+    
+    return true;
+}
+
 } // namespace dkv
 
 int main() {
@@ -130,6 +164,7 @@ int main() {
     
     runner.runTest("HashItem基本功能", testHashItem);
     runner.runTest("Hash命令测试", testHashCommands);
+    runner.runTest("HSET命令返回值", testHSetCommandAddedCount);
     
     runner.printSummary();
     